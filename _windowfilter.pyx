@@ -0,0 +1,73 @@
+# cython: language_level=3
+#
+# Optional compiled search filter for the Window Commander plugin.
+#
+# Build it next to catapult_window_commander.py with:
+#     cythonize -i _windowfilter.pyx
+# The plugin falls back to its pure-Python filter when this isn't built.
+
+from cpython.mem cimport PyMem_Free, PyMem_Malloc
+
+
+cdef extern from "string.h":
+    # pyconfig.h defines _GNU_SOURCE, which makes glibc declare memmem
+    void *memmem(const void *haystack, size_t haystacklen, const void *needle, size_t needlelen)
+
+
+cdef class WindowIndex:
+    """
+    The windows' joined lowercase title/class haystacks, encoded once as UTF-8
+    so each search is a memmem over every candidate.
+    """
+
+    cdef list _haystacks
+    cdef const char **_ptrs
+    cdef size_t *_lens
+    cdef Py_ssize_t _count
+
+    def __cinit__(self, list haystacks):
+        cdef Py_ssize_t i
+        cdef bytes encoded
+        self._haystacks = [haystack.encode("utf-8") for haystack in haystacks]
+        self._count = len(self._haystacks)
+        self._ptrs = <const char **>PyMem_Malloc(max(self._count, 1) * sizeof(const char *))
+        self._lens = <size_t *>PyMem_Malloc(max(self._count, 1) * sizeof(size_t))
+        if self._ptrs is NULL or self._lens is NULL:
+            raise MemoryError()
+        for i in range(self._count):
+            encoded = self._haystacks[i]
+            self._ptrs[i] = encoded
+            self._lens[i] = len(encoded)
+
+    def __dealloc__(self):
+        PyMem_Free(self._ptrs)
+        PyMem_Free(self._lens)
+
+    def filter(self, str term, candidates=None):
+        """
+        Returns (index, offset) for every candidate haystack containing term,
+        in candidate order. Offsets are in characters, like str.find().
+        """
+        cdef bytes needle = term.encode("utf-8")
+        cdef const char *needle_ptr = needle
+        cdef size_t needle_len = len(needle)
+        cdef const char *hit
+        cdef Py_ssize_t i, byte_offset
+        cdef list found = []
+
+        if candidates is None:
+            candidates = range(self._count)
+        for i in candidates:
+            # Candidates come from the caller, don't let a stale index read past the arrays
+            if i < 0 or i >= self._count:
+                raise IndexError(i)
+            if needle_len == 0:
+                found.append((i, 0))
+                continue
+            hit = <const char *>memmem(self._ptrs[i], self._lens[i], needle_ptr, needle_len)
+            if hit is NULL:
+                continue
+            byte_offset = hit - self._ptrs[i]
+            # Only matches pay for turning the byte offset into a character one
+            found.append((i, len(self._haystacks[i][:byte_offset].decode("utf-8"))))
+        return found
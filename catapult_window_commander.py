@@ -12,7 +12,30 @@
 
 import json
 import logging
-from typing import Any, Dict, Generator, List, Optional
+import os
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# orjson decodes the extension's JSON replies much faster when it is installed.
+# Its JSONDecodeError subclasses json.JSONDecodeError, so handlers stay the same.
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+# cffi lets the GetDetails loop talk to sd-bus directly when libsystemd exists
+try:
+    import cffi
+except ImportError:
+    cffi = None
+
+# Compiled search filter, built from _windowfilter.pyx next to this plugin
+try:
+    from _windowfilter import WindowIndex as _WindowIndex
+except ImportError:
+    _WindowIndex = None
 
 # GTK and D-Bus related imports
 from gi.repository import Gio, GLib
@@ -28,198 +51,699 @@ DBUS_DESTINATION = "org.gnome.Shell"
 DBUS_INTERFACE_NAME = "org.gnome.Shell.Extensions.WindowCommander"
 DBUS_OBJECT_PATH = "/org/gnome/Shell/Extensions/WindowCommander"
 
+# Upper bound on how long a cached window list is trusted. Signals from the
+# extension invalidate it sooner, but not every extension version emits them.
+CACHE_MAX_AGE = 2.0
+
+# Number of windows listed for a bare keyword ("w ") with no search term
+EMPTY_QUERY_MAX_WINDOWS = 8
+
+# Longest wait for sd-bus GetDetails replies, in seconds. sd-bus itself times
+# method calls out after 25 seconds; this only guards against lost replies.
+SD_BUS_REPLY_TIMEOUT = 30.0
+# How long a single sd_bus_wait() may block, in microseconds
+SD_BUS_WAIT_USEC = 100_000
+
+
+# A single proxy is shared by every plugin instance in the process, and dropped
+# once the last instance using it releases it
+_SHARED_PROXY: Optional[Gio.DBusProxy] = None
+_SHARED_PROXY_REFCOUNT = 0
+_SHARED_PROXY_LOCK = threading.Lock()
+
+
+def _get_shared_proxy() -> Optional[Gio.DBusProxy]:
+    """
+    Returns the process-wide Window Commander proxy, creating it on first use.
+    Every successful call must be paired with _release_shared_proxy().
+    """
+    global _SHARED_PROXY, _SHARED_PROXY_REFCOUNT
+    with _SHARED_PROXY_LOCK:
+        if _SHARED_PROXY is None:
+            try:
+                # The destination is org.gnome.Shell, not the interface name.
+                # The interface has no properties, but signals feed the cache.
+                _SHARED_PROXY = Gio.DBusProxy.new_for_bus_sync(
+                    Gio.BusType.SESSION,
+                    Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES,
+                    None,
+                    DBUS_DESTINATION,
+                    DBUS_OBJECT_PATH,
+                    DBUS_INTERFACE_NAME,
+                    None,
+                )
+                logger.info("Successfully connected to Window Commander D-Bus service.")
+            except GLib.Error as e:
+                logger.error(
+                    "Could not connect to Window Commander D-Bus service. "
+                    "Please ensure the GNOME Shell extension is installed and enabled. "
+                    f"Error: {e}"
+                )
+        if _SHARED_PROXY is not None:
+            _SHARED_PROXY_REFCOUNT += 1
+        return _SHARED_PROXY
+
+
+def _release_shared_proxy() -> None:
+    """Drops a reference to the shared proxy, freeing it when none are left."""
+    global _SHARED_PROXY, _SHARED_PROXY_REFCOUNT
+    with _SHARED_PROXY_LOCK:
+        _SHARED_PROXY_REFCOUNT -= 1
+        if _SHARED_PROXY_REFCOUNT <= 0:
+            _SHARED_PROXY_REFCOUNT = 0
+            _SHARED_PROXY = None
+
+
+# Declarations for the small part of libsystemd's sd-bus API used below
+_SD_BUS_CDEF = """
+typedef struct sd_bus sd_bus;
+typedef struct sd_bus_message sd_bus_message;
+typedef struct sd_bus_slot sd_bus_slot;
+typedef struct {
+    const char *name;
+    const char *message;
+    int _need_free;
+} sd_bus_error;
+typedef int (*sd_bus_message_handler_t)(sd_bus_message *m, void *userdata, sd_bus_error *ret_error);
+
+int sd_bus_open_user(sd_bus **ret);
+sd_bus *sd_bus_flush_close_unref(sd_bus *bus);
+int sd_bus_call_method_async(sd_bus *bus, sd_bus_slot **slot, const char *destination,
+                             const char *path, const char *interface, const char *member,
+                             sd_bus_message_handler_t callback, void *userdata,
+                             const char *types, ...);
+int sd_bus_process(sd_bus *bus, sd_bus_message **r);
+int sd_bus_wait(sd_bus *bus, uint64_t timeout_usec);
+int sd_bus_message_is_method_error(sd_bus_message *m, const char *name);
+const sd_bus_error *sd_bus_message_get_error(sd_bus_message *m);
+int sd_bus_message_read(sd_bus_message *m, const char *types, ...);
+"""
+
+
+class _SdBus:
+    """
+    A minimal sd-bus client for the GetDetails hot path. It skips the PyGObject
+    variant wrapping and hands back the raw JSON strings.
+
+    Raises OSError if libsystemd can't be loaded or the session bus opened.
+    """
+
+    def __init__(self):
+        ffi = cffi.FFI()
+        ffi.cdef(_SD_BUS_CDEF)
+        lib = ffi.dlopen("libsystemd.so.0")
+        bus = ffi.new("sd_bus **")
+        r = lib.sd_bus_open_user(bus)
+        if r < 0:
+            raise OSError(-r, os.strerror(-r))
+        self._ffi = ffi
+        self._lib = lib
+        self._bus = ffi.gc(bus[0], lib.sd_bus_flush_close_unref)
+        self._replies: Dict[int, str] = {}
+        # Each call's userdata is a small token that maps to its window ID here.
+        # Only the current get_details_json() run's tokens are kept, so late
+        # replies to an abandoned run are recognised and ignored.
+        self._calls: Dict[int, int] = {}
+        self._next_token = 0
+        # Kept alive for as long as the bus, since late replies still call it.
+        # It reaches this object through a weakref so the two don't form a
+        # cycle that keeps the connection open until the cyclic GC runs.
+        weak_self = weakref.ref(self)
+
+        def on_reply(message: Any, userdata: Any, ret_error: Any) -> int:
+            sd_bus = weak_self()
+            return sd_bus._handle_reply(message, userdata, ret_error) if sd_bus is not None else 0
+
+        self._on_reply = ffi.callback("int(sd_bus_message *, void *, sd_bus_error *)", on_reply)
+
+    def close(self) -> None:
+        """Flushes and closes the bus connection right away."""
+        if self._bus is not None:
+            self._ffi.release(self._bus)
+            self._bus = None
+
+    def _handle_reply(self, message: Any, userdata: Any, _ret_error: Any) -> int:
+        ffi, lib = self._ffi, self._lib
+        win_id = self._calls.pop(int(ffi.cast("uintptr_t", userdata)), None)
+        if win_id is None:
+            return 0
+        if lib.sd_bus_message_is_method_error(message, ffi.NULL):
+            error = lib.sd_bus_message_get_error(message)
+            text = ffi.string(error.message).decode() if error.message else "unknown error"
+            logger.error(f"Error calling D-Bus method 'GetDetails': {text}")
+            return 0
+        out = ffi.new("const char **")
+        if lib.sd_bus_message_read(message, b"s", out) >= 0:
+            self._replies[win_id] = ffi.string(out[0]).decode()
+        return 0
+
+    def get_details_json(self, win_ids: List[int]) -> Dict[int, str]:
+        """
+        Sends GetDetails for every window before waiting, so the calls overlap
+        on the bus, and returns the JSON replies keyed by window ID.
+        """
+        ffi, lib, bus = self._ffi, self._lib, self._bus
+        if bus is None:
+            return {}
+        destination = DBUS_DESTINATION.encode()
+        path = DBUS_OBJECT_PATH.encode()
+        interface = DBUS_INTERFACE_NAME.encode()
+        self._replies = {}
+        self._calls = {}
+        for win_id in win_ids:
+            # Tokens stay well inside 31 bits, so they survive the trip through
+            # a void * on 32-bit builds too
+            token = self._next_token = (self._next_token + 1) & 0x7FFFFFFF
+            r = lib.sd_bus_call_method_async(
+                bus, ffi.NULL, destination, path, interface, b"GetDetails",
+                self._on_reply, ffi.cast("void *", token),
+                b"u", ffi.cast("uint32_t", win_id),
+            )
+            if r < 0:
+                logger.error(f"Error calling D-Bus method 'GetDetails': {os.strerror(-r)}")
+            else:
+                self._calls[token] = win_id
+
+        # Failed or timed out calls still get an error reply, so this normally
+        # ends on its own. The deadline is a backstop so Catapult never hangs.
+        deadline = time.monotonic() + SD_BUS_REPLY_TIMEOUT
+        while self._calls:
+            r = lib.sd_bus_process(bus, ffi.NULL)
+            if r == 0:
+                if time.monotonic() >= deadline:
+                    logger.error(f"Timed out waiting for {len(self._calls)} GetDetails replies.")
+                    break
+                r = lib.sd_bus_wait(bus, SD_BUS_WAIT_USEC)
+            if r < 0:
+                logger.error(f"Error processing sd-bus replies: {os.strerror(-r)}")
+                break
+        self._calls = {}
+        return self._replies
+
+
+# Like the proxy, the sd-bus connection is shared by every plugin instance. It
+# is only opened on the first GetDetails that misses the cache.
+_SHARED_SD_BUS: Optional[_SdBus] = None
+_SHARED_SD_BUS_REFCOUNT = 0
+_SHARED_SD_BUS_UNAVAILABLE = cffi is None
+_SHARED_SD_BUS_LOCK = threading.Lock()
+
+
+def _get_shared_sd_bus() -> Optional[_SdBus]:
+    """
+    Returns the process-wide sd-bus client, opening it on first use, or None
+    if sd-bus can't be used. Every non-None result must be paired with
+    _release_shared_sd_bus().
+    """
+    global _SHARED_SD_BUS, _SHARED_SD_BUS_REFCOUNT, _SHARED_SD_BUS_UNAVAILABLE
+    with _SHARED_SD_BUS_LOCK:
+        if _SHARED_SD_BUS is None and not _SHARED_SD_BUS_UNAVAILABLE:
+            try:
+                _SHARED_SD_BUS = _SdBus()
+            except Exception as e:
+                # sd-bus is only an optimisation, so anything going wrong here
+                # (missing libsystemd, cdef errors, no executable memory for the
+                # ffi callback...) must fall back to Gio rather than break the
+                # search. Don't retry it on every cache miss either.
+                logger.info(f"sd-bus is not available, using Gio for GetDetails: {e!r}")
+                _SHARED_SD_BUS_UNAVAILABLE = True
+        if _SHARED_SD_BUS is not None:
+            _SHARED_SD_BUS_REFCOUNT += 1
+        return _SHARED_SD_BUS
+
+
+def _release_shared_sd_bus() -> None:
+    """Drops a reference to the shared sd-bus client, freeing it when none are left."""
+    global _SHARED_SD_BUS, _SHARED_SD_BUS_REFCOUNT
+    with _SHARED_SD_BUS_LOCK:
+        _SHARED_SD_BUS_REFCOUNT -= 1
+        if _SHARED_SD_BUS_REFCOUNT <= 0:
+            _SHARED_SD_BUS_REFCOUNT = 0
+            if _SHARED_SD_BUS is not None:
+                _SHARED_SD_BUS.close()
+            _SHARED_SD_BUS = None
+
 
 class WindowCommanderDBus:
     """A helper class to manage D-Bus communication with the GNOME extension."""
 
+    # Window actions mapped to their D-Bus method, the signature of its
+    # parameter tuple and any arguments that follow the window ID
+    _ACTION_METHODS = {
+        "activate": ("Activate", "(u)", ()),
+        "close": ("Close", "(ub)", (False,)),
+        "maximize": ("Maximize", "(u)", ()),
+        "unmaximize": ("Unmaximize", "(u)", ()),
+        "minimize": ("Minimize", "(u)", ()),
+    }
+
     def __init__(self):
         """Initializes the D-Bus proxy."""
+        self._proxy = _get_shared_proxy()
+        # Whether the extension exposes ListDetailed; None until first probed
+        self._bulk_supported: Optional[bool] = None
+        # Parsed window list, reused across keystrokes until invalidated
+        self._cache: Optional[List[Dict[str, Any]]] = None
+        self._cache_valid = False
+        self._cache_time = 0.0
+        # Full window details keyed by ID, only fetched for windows that need them
+        self._details_cache: Dict[int, Dict[str, Any]] = {}
+        # Shared sd-bus client for GetDetails, acquired on the first cache miss
+        self._sd_bus: Optional[_SdBus] = None
+        self._sd_bus_requested = False
+        # Set while an action sent on the Gio connection may not have been
+        # handled yet. D-Bus only orders messages within one connection, so a
+        # GetDetails over sd-bus could overtake it and cache a stale state.
+        self._action_unsynced = False
+        self._signal_sub: Optional[int] = None
+        if self._proxy:
+            # Any signal from the extension (window created/destroyed, focus or
+            # title changes) means the cached window list may be stale. The
+            # handler only holds a weak reference, otherwise the proxy would
+            # keep this object alive and __del__ would never disconnect it.
+            weak_self = weakref.ref(self)
+
+            def on_signal(proxy: Gio.DBusProxy, sender: str, signal: str, params: GLib.Variant) -> None:
+                client = weak_self()
+                if client is not None:
+                    client._on_signal(proxy, sender, signal, params)
+
+            self._signal_sub = self._proxy.connect("g-signal", on_signal)
+
+    def close(self) -> None:
+        """
+        Disconnects from the extension's signals and releases the shared proxy
+        and sd-bus connection.
+        """
+        # __del__ may run on an instance whose __init__ didn't finish
+        if getattr(self, "_proxy", None) is None:
+            return
+        if getattr(self, "_signal_sub", None) is not None:
+            self._proxy.disconnect(self._signal_sub)
+            self._signal_sub = None
         self._proxy = None
-        try:
-            # The destination is org.gnome.Shell, not the interface name
-            self._proxy = Gio.DBusProxy.new_for_bus_sync(
-                Gio.BusType.SESSION,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                DBUS_DESTINATION,
-                DBUS_OBJECT_PATH,
-                DBUS_INTERFACE_NAME,
-                None,
-            )
-            logger.info("Successfully connected to Window Commander D-Bus service.")
-        except GLib.Error as e:
-            logger.error(
-                "Could not connect to Window Commander D-Bus service. "
-                "Please ensure the GNOME Shell extension is installed and enabled. "
-                f"Error: {e}"
-            )
+        _release_shared_proxy()
+        if getattr(self, "_sd_bus", None) is not None:
+            self._sd_bus = None
+            _release_shared_sd_bus()
+
+    def __del__(self):
+        self.close()
+
+    def _on_signal(self, proxy: Gio.DBusProxy, sender: str, signal: str, params: GLib.Variant) -> None:
+        """Invalidates the window cache when the extension reports a change."""
+        logger.debug(f"Received D-Bus signal '{signal}', invalidating window cache.")
+        self.invalidate_cache()
+
+    def invalidate_cache(self) -> None:
+        """Forces the next window query to go to D-Bus."""
+        self._cache_valid = False
+        self._details_cache = {}
+
+    def _get_cached(self) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached window list if it is still fresh, otherwise None."""
+        if self._cache_valid and time.monotonic() - self._cache_time < CACHE_MAX_AGE:
+            return self._cache
+        return None
+
+    def _store_cache(self, windows: Optional[List[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """Caches a freshly fetched window list. Failed fetches are not cached."""
+        if windows is not None:
+            # Lowercase the searchable fields once per fetch, not once per keystroke,
+            # joined so one find() covers both. NUL keeps matches from straddling them.
+            for win in windows:
+                title_lower = win.get("title", "Untitled Window").lower()
+                win["_tc"] = title_lower + "\x00" + win.get("wm_class", "unknown").lower()
+                win["_tlen"] = len(title_lower)
+            self._cache = windows
+            self._cache_valid = True
+            self._cache_time = time.monotonic()
+            self._details_cache = {}
+        return windows
+
+    def _call_method_unchecked(self, method_name: str, params: Optional[GLib.Variant] = None) -> Any:
+        """Calls a D-Bus function, letting any GLib.Error propagate to the caller."""
+        # The full interface name must be prepended to the method for the call
+        full_method = f"{DBUS_INTERFACE_NAME}.{method_name}"
+        variant = self._proxy.call_sync(
+            full_method,
+            params,
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+        )
+        # gnome-shell answered after handling everything sent before this call
+        self._action_unsynced = False
+        if variant:
+            # The result is a tuple, we want the first element which is the JSON string
+            return variant.unpack()[0]
+        return None
 
-    def _call_method(self, method_name: str, params: Optional[tuple] = None) -> Any:
-        """Generic method to call a D-Bus function."""
+    def _call_method(self, method_name: str, params: Optional[GLib.Variant] = None) -> Any:
+        """
+        Generic method to call a D-Bus function. The params must already be a
+        tuple-typed GLib.Variant, e.g. GLib.Variant("(u)", (win_id,)).
+        """
         if not self._proxy:
             logger.warning("D-Bus proxy is not available. Cannot call method.")
             return None
         try:
-            # The full interface name must be prepended to the method for the call
-            full_method = f"{DBUS_INTERFACE_NAME}.{method_name}"
-            variant = self._proxy.call_sync(
-                full_method,
-                GLib.Variant.new_tuple(*(params or ())),
-                Gio.DBusCallFlags.NONE,
-                -1,
-                None,
-            )
-            if variant:
-                # The result is a tuple, we want the first element which is the JSON string
-                return variant.unpack()[0]
+            return self._call_method_unchecked(method_name, params)
         except GLib.Error as e:
             logger.error(f"Error calling D-Bus method '{method_name}': {e}")
         return None
 
-    def get_all_windows_with_details(self) -> Optional[List[Dict[str, Any]]]:
+    def _call_method_oneway(self, method_name: str, params: Optional[GLib.Variant] = None) -> None:
+        """
+        Sends a D-Bus call whose reply we don't care about and returns at once.
+
+        Without a callback GDBus flags the message as expecting no reply, so
+        neither Catapult nor the bus has to wait on or track a response.
+        """
+        if not self._proxy:
+            logger.warning("D-Bus proxy is not available. Cannot call method.")
+            return
+        self._proxy.get_connection().call(
+            DBUS_DESTINATION,
+            DBUS_OBJECT_PATH,
+            DBUS_INTERFACE_NAME,
+            method_name,
+            params,
+            None,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            -1,
+            None,
+            None,
+            None,
+        )
+
+    def _call_method_async(
+        self,
+        method_name: str,
+        params: Optional[GLib.Variant],
+        callback: Callable[[Any], None],
+    ) -> bool:
+        """
+        Dispatches a D-Bus call without waiting for the reply.
+
+        The callback receives the unpacked result (or None on failure) once the
+        reply arrives on the thread-default main context. Returns False if the
+        call could not be dispatched at all.
+        """
+        if not self._proxy:
+            logger.warning("D-Bus proxy is not available. Cannot call method.")
+            return False
+
+        def on_reply(proxy: Gio.DBusProxy, res: Gio.AsyncResult, _user_data: Any) -> None:
+            result = None
+            try:
+                variant = proxy.call_finish(res)
+                if variant:
+                    result = variant.unpack()[0]
+            except GLib.Error as e:
+                logger.error(f"Error calling D-Bus method '{method_name}': {e}")
+            callback(result)
+
+        full_method = f"{DBUS_INTERFACE_NAME}.{method_name}"
+        self._proxy.call(
+            full_method,
+            params,
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+            on_reply,
+            None,
+        )
+        return True
+
+    def _fetch_list_detailed(self) -> Optional[List[Dict[str, Any]]]:
         """
-        Fetches window list and then gets details for each window individually,
-        as required by the new extension API.
+        Fetches every window with its details in a single round trip using
+        ListDetailed. Returns None if the extension doesn't support it.
         """
-        # Step 1: Get the list of basic window info (contains IDs)
+        try:
+            list_json = self._call_method_unchecked("ListDetailed")
+        except GLib.Error as e:
+            if e.matches(Gio.dbus_error_quark(), Gio.DBusError.UNKNOWN_METHOD):
+                # Don't probe again, the extension won't grow the method at runtime
+                logger.info("ListDetailed is not supported by the extension, using List.")
+                self._bulk_supported = False
+            else:
+                logger.error(f"Error calling D-Bus method 'ListDetailed': {e}")
+            return None
+
+        self._bulk_supported = True
+        if not list_json:
+            return None
+        try:
+            return _json_loads(list_json)
+        except json.JSONDecodeError:
+            logger.error("Failed to decode JSON response from ListDetailed method.")
+            return None
+
+    def get_all_windows(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns the list of open windows, served from the cache when possible.
+        Every entry has id, title and wm_class; use get_details() for the rest.
+        """
+        cached = self._get_cached()
+        if cached is not None:
+            return cached
+
+        if self._proxy and self._bulk_supported is not False:
+            windows = self._fetch_list_detailed()
+            if windows is not None:
+                self._store_cache(windows)
+                # Every entry already carries its full details
+                self._details_cache = {win["id"]: win for win in windows if win.get("id")}
+                return windows
+
         list_json = self._call_method("List")
         if not list_json:
             return None
 
         try:
-            basic_windows = json.loads(list_json)
+            return self._store_cache(_json_loads(list_json))
         except json.JSONDecodeError:
             logger.error("Failed to decode JSON response from List method.")
             return None
 
-        detailed_windows = []
-        # Step 2: For each window, get its full details
-        for win in basic_windows:
-            win_id = win.get("id")
-            if not win_id:
-                continue
-
-            details_json = self._call_method("GetDetails", (GLib.Variant("u", win_id),))
-            if details_json:
+    def get_details(self, win_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Returns the full details of the given windows keyed by ID. Details that
+        aren't cached yet are fetched with concurrent GetDetails calls.
+        """
+        missing = [win_id for win_id in win_ids if win_id not in self._details_cache]
+        if missing and self._proxy and not self._sd_bus_requested:
+            self._sd_bus_requested = True
+            self._sd_bus = _get_shared_sd_bus()
+        if missing and self._sd_bus is not None and not self._action_unsynced:
+            details_cache = self._details_cache
+            loads = _json_loads
+            for win_id, details_json in self._sd_bus.get_details_json(missing).items():
                 try:
-                    details = json.loads(details_json)
-                    detailed_windows.append(details)
+                    details_cache[win_id] = loads(details_json)
                 except json.JSONDecodeError:
                     logger.error(f"Failed to decode JSON for window details (ID: {win_id}).")
-        return detailed_windows
+        elif missing:
+            # Request the details of every window at once so the calls overlap
+            # on the bus, then wait for all of the replies. A private main
+            # context keeps the wait from dispatching unrelated Catapult events.
+            context = GLib.MainContext.new()
+            loop = GLib.MainLoop.new(context, False)
+            pending = len(missing)
+            # Bind what the loop and callbacks use to locals, this runs per window
+            details_cache = self._details_cache
+            loads = _json_loads
+            call_async = self._call_method_async
+            Variant = GLib.Variant
+
+            def on_details(win_id: int, details_json: Optional[str]) -> None:
+                nonlocal pending
+                if details_json:
+                    try:
+                        details_cache[win_id] = loads(details_json)
+                    except json.JSONDecodeError:
+                        logger.error(f"Failed to decode JSON for window details (ID: {win_id}).")
+                pending -= 1
+                if pending == 0:
+                    loop.quit()
+
+            context.push_thread_default()
+            try:
+                for win_id in missing:
+                    dispatched = call_async(
+                        "GetDetails",
+                        Variant("(u)", (win_id,)),
+                        lambda details_json, w=win_id: on_details(w, details_json),
+                    )
+                    if not dispatched:
+                        pending -= 1
+                if pending > 0:
+                    loop.run()
+            finally:
+                context.pop_thread_default()
+            self._action_unsynced = False
+
+        return {win_id: self._details_cache[win_id] for win_id in win_ids if win_id in self._details_cache}
 
     def execute_action(self, action: str, win_id: int) -> None:
         """Executes a specific window action like activate, close, etc."""
-        # Mapping simple actions to D-Bus methods and their parameters
-        action_map = {
-            "activate": ("Activate", GLib.Variant("u", win_id)),
-            "close": ("Close", GLib.Variant("u", win_id), GLib.Variant("b", False)),
-            "maximize": ("Maximize", GLib.Variant("u", win_id)),
-            "unmaximize": ("Unmaximize", GLib.Variant("u", win_id)),
-            "minimize": ("Minimize", GLib.Variant("u", win_id)),
-        }
-        if action in action_map:
-            method_name, *params = action_map[action]
-            self._call_method(method_name, tuple(params))
+        if action in self._ACTION_METHODS:
+            method_name, signature, extras = self._ACTION_METHODS[action]
+            params = GLib.Variant(signature, (win_id, *extras))
+            # Window actions reply with nothing, so don't block the UI on them
+            self._call_method_oneway(method_name, params)
+            self._action_unsynced = True
+            # Closing or (un)maximizing changes what the next search should show
+            self.invalidate_cache()
         else:
             logger.warning(f"Unknown window action requested: {action}")
 
 
+def _filter_windows(
+    windows: List[Dict[str, Any]],
+    term: str,
+    candidates: Optional[Iterable[int]] = None,
+) -> List[Tuple[int, int]]:
+    """
+    Returns (index, offset) for every candidate window whose joined title/class
+    haystack contains term. The pure-Python twin of _windowfilter.WindowIndex.
+    """
+    if candidates is None:
+        candidates = range(len(windows))
+    found = []
+    for i in candidates:
+        offset = windows[i]["_tc"].find(term)
+        if offset != -1:
+            found.append((i, offset))
+    return found
+
+
 class WindowCommander(Plugin):
     """Catapult plugin for interacting with the Window Commander GNOME extension."""
 
     title = "Window Commander"
     description = "List, focus, and manage open windows."
     keywords = ["w", "win", "window"]
+    # Trigger prefixes, longest first so the most specific keyword wins
+    _PREFIXES = tuple(sorted((keyword + " " for keyword in keywords), key=len, reverse=True))
+
+    # Results offered per window as (action id prefix, score, title prefix,
+    # description prefix, icon). The title prefix is followed by the window's
+    # title, the description prefix by its wm_class, and an icon of None means
+    # the wm_class is used as the icon.
+    _RESULT_ACTIVATE = ("activate:", 100, "", "Activate | Class: ", None)
+    _RESULT_CLOSE = ("close:", 90, "Close: ", "Close Window | Class: ", "window-close")
+    _RESULT_MAXIMIZE = ("maximize:", 80, "Maximize: ", "Maximize Window | Class: ", "view-fullscreen")
+    _RESULT_UNMAXIMIZE = ("unmaximize:", 80, "Unmaximize: ", "Unmaximize Window | Class: ", "view-restore")
+    _RESULTS_MAXIMIZED = (_RESULT_ACTIVATE, _RESULT_CLOSE, _RESULT_UNMAXIMIZE)
+    _RESULTS_UNMAXIMIZED = (_RESULT_ACTIVATE, _RESULT_CLOSE, _RESULT_MAXIMIZE)
 
     def __init__(self):
         super().__init__()
         self.dbus_client = WindowCommanderDBus()
-
-    def search(self, query: str) -> Generator[SearchResult, None, None]:
-        """Catapult search handler."""
-        trigger_word = ""
-        for keyword in self.keywords:
-            if query.lower().startswith(keyword + " "):
-                trigger_word = keyword + " "
-                break
-        if not trigger_word:
-            return
-
-        search_term = query[len(trigger_word) :].strip().lower()
-
-        windows = self.dbus_client.get_all_windows_with_details()
+        # Previous search, used to narrow the scan while the user keeps typing
+        self._last_windows: Optional[List[Dict[str, Any]]] = None
+        self._last_term = ""
+        self._last_hits: List[int] = []
+        # Compiled filter index and the window list it was built from
+        self._index: Any = None
+        self._index_windows: Optional[List[Dict[str, Any]]] = None
+
+    def search(self, query: str) -> List[SearchResult]:
+        """Catapult search handler. Results are returned as one list."""
+        query_lower = query.lower()
+        if not query_lower.startswith(self._PREFIXES):
+            return []
+
+        trigger_word = next(prefix for prefix in self._PREFIXES if query_lower.startswith(prefix))
+        search_term = query_lower[len(trigger_word) :].strip()
+
+        windows = self.dbus_client.get_all_windows()
         if windows is None: # Check for None specifically, as an empty list is valid
-            yield SearchResult(
-                id="error:no-connection",
-                title="Window Commander Not Found or Failed",
-                description="Please ensure the GNOME extension is enabled.",
-                icon="dialog-warning",
-                plugin=self,
-                score=100,
-                fuzzy=False,
-                offset=0,
-            )
-            return
-
-        for win in windows:
-            title = win.get("title", "Untitled Window")
-            wm_class = win.get("wm_class", "unknown")
-            title_lower = title.lower()
-            class_lower = wm_class.lower()
+            return [
+                SearchResult(
+                    id="error:no-connection",
+                    title="Window Commander Not Found or Failed",
+                    description="Please ensure the GNOME extension is enabled.",
+                    icon="dialog-warning",
+                    plugin=self,
+                    score=100,
+                    fuzzy=False,
+                    offset=0,
+                )
+            ]
+
+        # A window matching the extended term must have matched its prefix too,
+        # so while the window list is unchanged only the last hits are rescanned
+        candidates: Optional[Iterable[int]] = None
+        if windows is self._last_windows and search_term.startswith(self._last_term):
+            candidates = self._last_hits
+        if not search_term:
+            # Just the keyword: show a few windows instead of every window's
+            # actions, which would also mean fetching details for all of them
+            candidates = range(min(len(windows), EMPTY_QUERY_MAX_WINDOWS))
+
+        # Filter on the fields List already provides, then fetch the remaining
+        # details (maximized state) only for the windows that matched
+        if _WindowIndex is not None:
+            if windows is not self._index_windows:
+                # Encode the haystacks once per window list, not per keystroke
+                self._index = _WindowIndex([win["_tc"] for win in windows])
+                self._index_windows = windows
+            found = self._index.filter(search_term, candidates)
+        else:
+            found = _filter_windows(windows, search_term, candidates)
 
-            offset = title_lower.find(search_term)
-            if offset == -1:
-                offset = class_lower.find(search_term)
-                if offset == -1:
-                    continue # Skip if search term not found in title or class
+        hits = []
+        matches = []
+        for i, offset in found:
+            win = windows[i]
+            if offset > win["_tlen"]:
+                # Matched in the class, make the offset relative to it
+                offset -= win["_tlen"] + 1
 
+            hits.append(i)
             win_id = win.get("id")
             if not win_id:
                 continue
+            title = win.get("title", "Untitled Window")
+            wm_class = win.get("wm_class", "unknown")
+            matches.append((win_id, title, wm_class, offset))
+        if search_term:
+            self._last_windows, self._last_term, self._last_hits = windows, search_term, hits
+        else:
+            # The capped hits aren't every window, so they can't seed narrowing
+            self._last_windows = None
 
-            # --- Yield a SearchResult for each available action ---
-
-            # 1. Activate Window
-            yield SearchResult(
-                id=f"activate:{win_id}",
-                title=title,
-                description=f"Activate | Class: {wm_class}",
-                icon=wm_class,
-                plugin=self,
-                score=100,
-                fuzzy=False,
-                offset=offset,
-            )
-
-            # 2. Close Window
-            yield SearchResult(
-                id=f"close:{win_id}",
-                title=f"Close: {title}",
-                description=f"Close Window | Class: {wm_class}",
-                icon="window-close",
-                plugin=self,
-                score=90,
-                fuzzy=False,
-                offset=offset,
-            )
+        details = self.dbus_client.get_details([win_id for win_id, *_ in matches])
 
-            # 3. Maximize/Unmaximize
-            if win.get("maximized", 0) > 0:
-                action_id, action_name, icon_name = "unmaximize", "Unmaximize", "view-restore"
+        results = []
+        append = results.append
+        for win_id, title, wm_class, offset in matches:
+            # Pick between Maximize and Unmaximize from the window's state
+            if details.get(win_id, {}).get("maximized", 0) > 0:
+                actions = self._RESULTS_MAXIMIZED
             else:
-                action_id, action_name, icon_name = "maximize", "Maximize", "view-fullscreen"
-
-            yield SearchResult(
-                id=f"{action_id}:{win_id}",
-                title=f"{action_name}: {title}",
-                description=f"{action_name} Window | Class: {wm_class}",
-                icon=icon_name,
-                plugin=self,
-                score=80,
-                fuzzy=False,
-                offset=offset,
-            )
+                actions = self._RESULTS_UNMAXIMIZED
+
+            # Add a SearchResult for each available action
+            id_suffix = str(win_id)
+            for id_prefix, score, title_prefix, description_prefix, icon in actions:
+                append(
+                    SearchResult(
+                        id=id_prefix + id_suffix,
+                        title=title_prefix + title,
+                        description=description_prefix + wm_class,
+                        icon=wm_class if icon is None else icon,
+                        plugin=self,
+                        score=score,
+                        fuzzy=False,
+                        offset=offset,
+                    )
+                )
+        return results
 
     def launch(self, window: Any, id: str) -> None:
         """Called by Catapult when the user selects a result."""